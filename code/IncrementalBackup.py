@@ -15,20 +15,41 @@
 import logHandler
 
 from argparse import ArgumentParser, ArgumentTypeError, SUPPRESS, RawDescriptionHelpFormatter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+import os
 from pathlib import Path
 import re
-from shutil import rmtree
-from socket import getfqdn
-from subprocess import run
-import time
+from threading import Thread
+
+# Imported where needed (only used once a backup is actually done; not
+# needed for --help, --version or invalid arguments):
+# fcntl, shlex, shutil.rmtree, socket.getfqdn, subprocess
 
 _SCRIPT_VERSION = '1.0.0'
 
+# Name pattern of finished backups (see <datetime_string_now> in backup())
+_BACKUP_RE = re.compile(r'\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}\Z')
+
+# More excludes than this are passed to rsync in a file (--exclude-from)
+_MAX_EXCLUDE_ARGS = 32
+
+# Options passed to every rsync call
+# --numeric-ids: source and destination are on the same system, so there is
+# no need to map every uid/gid to a name and back
+# (--inplace is not used: recycled backups share hard-links with other backups,
+# which would be modified as well)
+_RSYNC_BASE_ARGS = ('rsync', '-a', '--delete', '--numeric-ids')
+
+# Number of latest backups passed to rsync as --link-dest (rsync allows 20).
+# Every additional directory costs a stat() per changed file.
+_MAX_LINK_DEST = 3
+
 # Structure of some important variables:
 #
 # variable: sources
-# Paths to the source directories and source-check-files
+# Paths to the source directories and source-check-files (absolute)
 # [
 #     {
 #         'id'         : <source_identifier>, # string
@@ -41,7 +62,7 @@ _SCRIPT_VERSION = '1.0.0'
 # Default source id when using only once source and not assigning an id
 #
 # variable: destination
-# Path to the backup directory and destination-check-file
+# Path to the backup directory and destination-check-file (absolute)
 # {
 #     'path'      : <path_to_destination>, # Path
 #     'check_file': <check_file>           # Path
@@ -54,6 +75,22 @@ _SCRIPT_VERSION = '1.0.0'
 # }
 
 
+# _get_fqdn
+#
+# Get the fully qualified domain name of this computer. The lookup can block
+# for seconds on hosts with a misconfigured DNS, so it is done only once. The
+# name can be overridden with the environment variable BACKUP_FQDN.
+#
+# @return   Returns the fully qualified domain name
+@lru_cache(maxsize=1)
+def _get_fqdn():
+    fqdn = os.environ.get('BACKUP_FQDN')
+    if not fqdn:
+        from socket import getfqdn
+        fqdn = getfqdn()
+    return fqdn
+
+
 # _get_old_backups
 #
 # Get the paths of previous backups located in <_path_destination>.
@@ -61,34 +98,31 @@ _SCRIPT_VERSION = '1.0.0'
 # @param Path   _path_destination
 #
 # @return   Returns a sorted list of backups in the <_path_destination> folder
+#
+# @note The list is sorted from oldest to latest backup. Callers rely on this:
+#       [0] is the oldest and [-1] the latest backup.
 def _get_old_backups(_path_destination):
-    paths_old_backups = [i_path for i_path in _path_destination.iterdir()
-                         if i_path.is_dir() and \
-                            i_path.stem not in ['tmp_partial_backup'] and \
-                            not re.fullmatch('\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}', i_path.stem) is None]
+    # os.scandir uses the file type from readdir -> no stat() per entry
+    with os.scandir(_path_destination) as it:
+        names_old_backups = [i_entry.name for i_entry in it
+                             if i_entry.is_dir(follow_symlinks=False) and \
+                                i_entry.name != 'tmp_partial_backup' and \
+                                _BACKUP_RE.match(i_entry.name)]
     
-    paths_old_backups.sort()
+    names_old_backups.sort()
 
-    return paths_old_backups
+    return [_path_destination.joinpath(i_name) for i_name in names_old_backups]
 
 
-# _process_argparse
-#
-# Uses argparse to process the arguments given to the script.
-#
-# @param        _logger
-# @param str    _source_id_none
+# _get_argument_parser
 #
-# @return (<err_code>, <sources>, <destination>, <keep_n_backups>,
-#          <backup_excludes>, <path_log_files>, <path_log_summary>)
+# Creates the ArgumentParser used by _process_argparse().
 #
-# @note See comments at the top of this file for more information on the
-#           structure of the variables.
+# @return ArgumentParser
 #
-# @note err_code  0: OK
-# @note err_code 11: ArgumentTypeError: <keep> must be positive int
-# @note err_code 12: ArgumentTypeError: <dst_fqdn> must be true, false, 0 or 1
-def _process_argparse(_logger, _source_id_none = '#DEFAULT_SOURCE_ID#'):
+# @note The parser is only built once and reused by later calls.
+@lru_cache(maxsize=1)
+def _get_argument_parser():
     global _SCRIPT_VERSION
     
     parser_description = '''
@@ -161,7 +195,33 @@ Examples:
     optional_args.add_argument('--log_summary',
         default=None,
         help='Format: <path>. Path to a file where the log-files will be listed.')
+    optional_args.add_argument('--parallel',
+        default=1,
+        help='Format: <pos_num>. Number of sources to back up at the same time. Only useful if the sources are on different disks. Default is 1.')
+
+    return parser
+
 
+# _process_argparse
+#
+# Uses argparse to process the arguments given to the script.
+#
+# @param        _logger
+# @param str    _source_id_none
+#
+# @return (<err_code>, <sources>, <destination>, <keep_n_backups>,
+#          <backup_excludes>, <path_log_files>, <path_log_summary>,
+#          <n_parallel>)
+#
+# @note See comments at the top of this file for more information on the
+#           structure of the variables.
+#
+# @note err_code  0: OK
+# @note err_code 11: ArgumentTypeError: <keep> must be positive int
+# @note err_code 12: ArgumentTypeError: <dst_fqdn> must be true, false, 0 or 1
+# @note err_code 13: ArgumentTypeError: <parallel> must be int > 0
+def _process_argparse(_logger, _source_id_none = '#DEFAULT_SOURCE_ID#'):
+    parser = _get_argument_parser()
     args = parser.parse_args()
 
     # Convert args.keep to int
@@ -171,7 +231,7 @@ Examples:
             raise ArgumentTypeError()
     except:
         _logger.error('<keep> must be a positive integer value.')
-        return (11, None, None, None, None, None, None)
+        return (11, None, None, None, None, None, None, None)
 
     # Convert <dst_fqdn> to bool
     try:
@@ -183,12 +243,22 @@ Examples:
             raise ArgumentTypeError()
     except:
         _logger.error('<dst_fqdn> must be a boolean value.')
-        return (12, None, None, None, None, None, None)
+        return (12, None, None, None, None, None, None, None)
+
+    # Convert args.parallel to int
+    try:
+        parallel = int(args.parallel)
+        if parallel < 1:
+            raise ArgumentTypeError()
+    except:
+        _logger.error('<parallel> must be an integer value greater than 0.')
+        return (13, None, None, None, None, None, None, None)
     
     return _process_arguments(_src=args.src, _dst=args.dst, _keep=keep,
                              _exclude=args.exclude, _dst_fqdn=args.dst_fqdn,
                              _path_log_files=args.path_log_files,
                              _path_log_summary=args.log_summary,
+                             _parallel=parallel,
                              _source_id_none=_source_id_none)
 
 
@@ -203,13 +273,17 @@ Examples:
 # @param bool           _dst_fqdn
 # @param str            _path_log_files
 # @param str            _path_log_summary
+# @param int            _parallel
 # @param str            _source_id_none
 #
 # @return (<err_code>, <sources>, <destination>, <keep_n_backups>,
-#          <backup_excludes>, <path_log_files>, <path_log_summary>)
+#          <backup_excludes>, <path_log_files>, <path_log_summary>,
+#          <n_parallel>)
 #
 # @note See comments at the top of this file for more information on the
 #           structure of the variables.
+# @note All returned paths are absolute. They are resolved against the current
+#           working directory once, here, instead of in every log message.
 #
 # @note err_code  0: OK
 # @note err_code 21: ArgumentTypeError: one or more sources have an invalid
@@ -221,15 +295,16 @@ Examples:
 # @note err_code 25: Error: Exclude cannot be associated with any source
 # @note err_code 26: Error: Exclude was not assigned an id
 def _process_arguments(_src, _dst, _keep, _exclude, _dst_fqdn, _path_log_files,
-                      _path_log_summary, _source_id_none = '#DEFAULT_SOURCE_ID#'):
-    # @return <err_code>
-    # @note err_code 0: OK
-    # @note err_code 1: ArgumentTypeError: Invalid key#value pair
-    def check_key_value_pair(argument):
-        split = argument.split('~#~')
-        if not (len(split) == 2 and len(split[0]) > 0 and len(split[1]) > 0):
-            return 1
-        return 0
+                      _path_log_summary, _parallel = 1,
+                      _source_id_none = '#DEFAULT_SOURCE_ID#'):
+    # @return ((<key>, <value>) | None, <sep>)
+    # @note (<key>, <value>) is None if <argument> is not a key~#~value pair
+    # @note <sep> is empty if <argument> does not contain '~#~' at all
+    def split_key_value_pair(argument):
+        key, sep, value = argument.partition('~#~')
+        if not (sep and key and value) or '~#~' in value:
+            return None, sep
+        return (key, value), sep
     
     # Convert str to [str]
     if type(_src) is str:
@@ -237,45 +312,50 @@ def _process_arguments(_src, _dst, _keep, _exclude, _dst_fqdn, _path_log_files,
     
     # Prepare <sources> variable
     sources = []
+    sources_by_id = {}
     if len(_src) == 1:
         # only one source
         tmp_id = None
         tmp_path = None
 
         src = _src[0]
-        if '~#~' in src:
-            if check_key_value_pair(src) != 0:
+        key_value, sep = split_key_value_pair(src)
+        if sep:
+            if key_value is None:
                 # ArgumentTypeError: Invalid key~#~value pair
                 _logger.error(f'Invalid key~#~value pair for source: "{src}"')
-                return (21, None, None, None, None, None, None)
-            tmp_id = src.split('~#~')[0]
-            tmp_path = Path(src.split('~#~')[1])
+                return (21, None, None, None, None, None, None, None)
+            tmp_id, tmp_path = key_value
+            tmp_path = Path(tmp_path).absolute()
         else:
             tmp_id = _source_id_none
-            tmp_path = Path(src)
+            tmp_path = Path(src).absolute()
         sources.append({ 'id': tmp_id, 'path': tmp_path,
                          'check_file': tmp_path.joinpath('.backup_src_check') })
+        sources_by_id[tmp_id] = sources[-1]
     else:
         # multiple sources
         for i_src in _src:
-            if check_key_value_pair(i_src) != 0:
+            key_value, _ = split_key_value_pair(i_src)
+            if key_value is None:
                 # ArgumentTypeError: Invalid key~#~value pair
                 _logger.error(f'Invalid key~#~value pair for source: "{i_src}"')
-                return (21, None, None, None, None, None, None)
-            tmp_id = i_src.split('~#~')[0]
-            tmp_path = Path(i_src.split('~#~')[1])
+                return (21, None, None, None, None, None, None, None)
+            tmp_id, tmp_path = key_value
+            tmp_path = Path(tmp_path).absolute()
             # Check if source-id is unique
-            if tmp_id in [i_source['id'] for i_source in sources]:
+            if tmp_id in sources_by_id:
                 # Source id is used more than once
                 _logger.error(f'Source id "{tmp_id}" must be unique.')
-                return (22, None, None, None, None, None, None)
+                return (22, None, None, None, None, None, None, None)
             sources.append({ 'id': tmp_id, 'path': tmp_path,
                              'check_file': tmp_path.joinpath('.backup_src_check') })
+            sources_by_id[tmp_id] = sources[-1]
     
     # Prepare <destination> variable
-    tmp_dst_path = Path(_dst)
+    tmp_dst_path = Path(_dst).absolute()
     if _dst_fqdn:
-        tmp_dst_path = tmp_dst_path.joinpath(getfqdn())
+        tmp_dst_path = tmp_dst_path.joinpath(_get_fqdn())
     destination = { 'path': tmp_dst_path,
                     'check_file': tmp_dst_path.joinpath('.backup_dst_check') }
     
@@ -286,42 +366,51 @@ def _process_arguments(_src, _dst, _keep, _exclude, _dst_fqdn, _path_log_files,
     backup_excludes = {}
     for i_source in sources:
         backup_excludes[i_source['id']] = []
+    n_sources = len(sources)
+    first_source_id = sources[0]['id']
     for i_exclude in _exclude:
-        if '~#~' in i_exclude:
-            if check_key_value_pair(i_exclude) != 0:
+        key_value, sep = split_key_value_pair(i_exclude)
+        if sep:
+            if key_value is None:
                 # ArgumentTypeError: Invalid key~#~value pair
                 _logger.error(f'Invalid key~#~value pair for exclude: "{i_exclude}"')
-                return (23, None, None, None, None, None, None)
-            tmp_id = i_exclude.split('~#~')[0]
-            tmp_path = i_exclude.split('~#~')[1]
-            if not tmp_id in [i_source['id'] for i_source in sources]:
+                return (23, None, None, None, None, None, None, None)
+            tmp_id, tmp_path = key_value
+            if not tmp_id in sources_by_id:
                 # Error: Exclude-ID was not assigned to any source
                 _logger.error(f'Exclude ID "{tmp_id}" was not assigned to any source.')
-                return (24, None, None, None, None, None, None)
+                return (24, None, None, None, None, None, None, None)
             backup_excludes[tmp_id].append(tmp_path)
         else:
             tmp_id = _source_id_none
             tmp_path = i_exclude
-            if len(sources) > 1:
+            if n_sources > 1:
                 # Error: Exclude cannot be associated with any source
                 _logger.error('Exclude cannot be associated with any source.')
-                return (25, None, None, None, None, None, None)                
-            if not sources[0]['id'] == _source_id_none:
+                return (25, None, None, None, None, None, None, None)                
+            if not first_source_id == _source_id_none:
                 # Error: Exclude was not assigned an id
                 _logger.error('Exclude was not assigned an id.')
-                return (26, None, None, None, None, None, None)
+                return (26, None, None, None, None, None, None, None)
             backup_excludes[tmp_id].append(tmp_path)
+    # Remove duplicate excludes (keeps the order; patterns are not normalized
+    # because rsync treats e.g. 'dir/' and 'dir' differently)
+    for i_id, i_excludes in backup_excludes.items():
+        backup_excludes[i_id] = list(dict.fromkeys(i_excludes))
     
     # Prepare <path_log_files> variable
-    path_log_files = Path(_path_log_files)
+    path_log_files = Path(_path_log_files).absolute()
 
     # Prepare <path_log_summary> variable
     path_log_summary = path_log_files.joinpath('latest_log_files.txt')
     if not _path_log_summary is None:
-        path_log_summary = Path(_path_log_summary)
+        path_log_summary = Path(_path_log_summary).absolute()
     
+    # Prepare <n_parallel> variable
+    n_parallel = _parallel
+
     return (0, sources, destination, keep_n_backups, backup_excludes,
-            path_log_files, path_log_summary)
+            path_log_files, path_log_summary, n_parallel)
 
 
 # _check_requirements
@@ -355,8 +444,11 @@ def _check_requirements(_sources, _destination, _logger):
         # Check if source / data directories exist
         for i_source in _sources:
             _logger.info(f'Checking if data directory for id "{i_source["id"]}" exists...')
-            if not (i_source['path'].exists() and i_source['path'].is_dir()):
-                _logger.error(f'Directory does not exist: "{i_source["path"].absolute()}"')
+            if not i_source['path'].is_dir():
+                if i_source['path'].exists():
+                    _logger.error(f'Not a directory: "{i_source["path"]}"')
+                else:
+                    _logger.error(f'Directory does not exist: "{i_source["path"]}"')
                 err_code = 31
                 raise FileNotFoundError()
             else:
@@ -364,8 +456,11 @@ def _check_requirements(_sources, _destination, _logger):
 
         # Check if destination / backup directory exists
         _logger.info(f'Checking if backup directory exists...')
-        if not (_destination['path'].exists() and _destination['path'].is_dir()):
-            _logger.error(f'Directory does not exist: "{_destination["path"].absolute()}"')
+        if not _destination['path'].is_dir():
+            if _destination['path'].exists():
+                _logger.error(f'Not a directory: "{_destination["path"]}"')
+            else:
+                _logger.error(f'Directory does not exist: "{_destination["path"]}"')
             err_code = 32
             raise FileNotFoundError()
         else:
@@ -374,8 +469,11 @@ def _check_requirements(_sources, _destination, _logger):
         # Check if source-check-files exist
         for i_source in _sources:
             _logger.info(f'Checking if source-check-file for id "{i_source["id"]}" exists...')
-            if not (i_source['check_file'].exists() and i_source['check_file'].is_file()):
-                _logger.error(f'File does not exist: "{i_source["check_file"].absolute()}"')
+            if not i_source['check_file'].is_file():
+                if i_source['check_file'].exists():
+                    _logger.error(f'Not a file: "{i_source["check_file"]}"')
+                else:
+                    _logger.error(f'File does not exist: "{i_source["check_file"]}"')
                 err_code = 33
                 raise FileNotFoundError()
             else:
@@ -383,8 +481,11 @@ def _check_requirements(_sources, _destination, _logger):
 
         # Check if destination-check-file exists
         _logger.info(f'Checking if destination-check-file exists...')
-        if not (_destination['check_file'].exists() and _destination['check_file'].is_file()):
-            _logger.error(f'File does not exist: "{_destination["check_file"].absolute()}"')
+        if not _destination['check_file'].is_file():
+            if _destination['check_file'].exists():
+                _logger.error(f'Not a file: "{_destination["check_file"]}"')
+            else:
+                _logger.error(f'File does not exist: "{_destination["check_file"]}"')
             err_code = 34
             raise FileNotFoundError()
         else:
@@ -395,8 +496,9 @@ def _check_requirements(_sources, _destination, _logger):
         # @return 0 if file can be read. 1 otherwise
         def read_file(path):
             try:
-                with open(path, 'r') as file:
-                    file.read()
+                # Reading one byte is enough to probe the permission
+                with open(path, 'rb') as file:
+                    file.read(1)
                 return 0
             except:
                 return 1
@@ -404,7 +506,7 @@ def _check_requirements(_sources, _destination, _logger):
         for i_source in _sources:
             _logger.info(f'Checking if script has read permission for id "{i_source["id"]}"...')
             if not read_file(i_source['check_file']) == 0:
-                _logger.error(f'Cannot read file: "{i_source["check_file"].absolute()}"')
+                _logger.error(f'Cannot read file: "{i_source["check_file"]}"')
                 err_code = 35
                 raise Exception()
             else:
@@ -417,8 +519,6 @@ def _check_requirements(_sources, _destination, _logger):
             try:
                 with open(path, 'w') as file:
                     file.write('IncrementalBackup was here!')
-                    print('A')
-                print(path)
                 return 0
             except:
                 return 1
@@ -426,84 +526,210 @@ def _check_requirements(_sources, _destination, _logger):
         _logger.info(f'Checking if script has write permission in destination...')
         path_testfile = _destination['path'].joinpath('IncrementalBackup_checkfile')
         if not create_file(path_testfile) == 0:
-            _logger.error(f'Cannot create file: "{path_testfile.absolute()}"')
+            _logger.error(f'Cannot create file: "{path_testfile}"')
             err_code = 36
             raise Exception()
         else:
             _logger.info('OK.')
     
-    except Exception():
+    except Exception:
         _logger.error('WARNING: No backup will be done!')
     
     return err_code
 
 
+# _lock_destination
+#
+# Makes sure that only one backup is done to <_destination> at the same time.
+#
+# @param dict   _destination
+# @param        _logger
+#
+# @return <err_code>, <lock_file>
+#
+# @note The lock is held until <lock_file> is closed (or the process exits).
+#       The lock-file itself is never deleted.
+#
+# @note err_code  0: OK
+# @note err_code 61: another backup to this destination is running
+def _lock_destination(_destination, _logger):
+    import fcntl
+
+    path_lock_file = _destination['path'].joinpath('.backup_lock')
+
+    _logger.info('Checking if another backup to this destination is running...')
+    lock_file = open(path_lock_file, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        _logger.error(f'Another backup is running. Lock-file: "{path_lock_file}"')
+        _logger.error('WARNING: No backup will be done!')
+        return 61, None
+    _logger.info('OK.')
+
+    return 0, lock_file
+
+
 # _prepare_backup
 #
 # Creates log-files directories, deletes old backups and prepares the
 # tmp_partial_backup folder.
 #
 # @param dict   _sources
+# @param str    _source_id_none
 # @param dict   _destination
 # @param int    _keep_n_backups
-# @param Path   _path_log_files
 # @param        _logger
 #
-# @return <err_code>
+# @return <err_code>, <paths_old_backups>, <deletion_thread>
+#
+# @note <paths_old_backups> is the sorted list of backups that are left after
+#       deleting and recycling old backups (see _get_old_backups()).
+# @note Old backups are moved to the tmp_deleted_backups folder and deleted by
+#       <deletion_thread>, which runs in parallel to the backup. The caller
+#       must join() it. <deletion_thread> is None if nothing has to be deleted.
 #
 # @note err_code 0: OK
 #
 # (@note err_code: 4x)
-def _prepare_backup(_sources, _destination, _keep_n_backups, _logger):
+def _prepare_backup(_sources, _source_id_none, _destination, _keep_n_backups,
+                    _logger):
+    from shutil import rmtree
+
     backup_to_tmp = _destination['path'].joinpath('tmp_partial_backup')
+    backups_to_delete = _destination['path'].joinpath('tmp_deleted_backups')
 
     paths_old_backups = _get_old_backups(_destination['path'])
+    # Nothing below creates tmp_partial_backup before it is checked again
+    backup_to_tmp_exists = backup_to_tmp.exists()
 
     # Remove old backups - keep <keep_n_backups> latest backups
     if _keep_n_backups > 0:
-        if backup_to_tmp.exists():
+        if backup_to_tmp_exists:
             _logger.warning('Last backup was not finished. Continuing.')
             _keep_n_backups -= 1
-        backups_to_remove = paths_old_backups[:-_keep_n_backups]
-        paths_old_backups = paths_old_backups[len(backups_to_remove):]
+        # Split the sorted list once (nothing is removed if <_keep_n_backups>
+        # dropped to 0 because of the unfinished backup)
+        n_backups_to_remove = 0
+        if _keep_n_backups > 0:
+            n_backups_to_remove = max(0, len(paths_old_backups) - _keep_n_backups)
+        backups_to_remove = paths_old_backups[:n_backups_to_remove]
+        paths_old_backups = paths_old_backups[n_backups_to_remove:]
+
+        # Only move the old backups out of the way (one rename each); they are
+        # deleted in the background while rsync is running
         for i_backup in backups_to_remove:
-            _logger.info(f'Deleting old backup: "{i_backup.absolute()}"')
-            rmtree(i_backup)
-            _logger.info(f'Done.')
+            _logger.info(f'Moving old backup to "{backups_to_delete.name}": "{i_backup}"')
+            backups_to_delete.mkdir(exist_ok=True)
+            os.replace(i_backup, backups_to_delete.joinpath(i_backup.name))
 
     # Create tmp_partial_backup folder
-    if not backup_to_tmp.exists():
+    if not backup_to_tmp_exists:
         if _keep_n_backups > 0 and len(paths_old_backups) == _keep_n_backups:
             # Recycle old backup
-            backup_to_recycle = min(paths_old_backups)
-            _logger.info(f'Preparing to recycle old backup: "{backup_to_recycle.absolute()}"...')
-            backup_to_recycle.rename(backup_to_tmp)
+            backup_to_recycle = paths_old_backups[0]
+            _logger.info(f'Preparing to recycle old backup: "{backup_to_recycle}"...')
+            os.replace(backup_to_recycle, backup_to_tmp)
+            paths_old_backups = paths_old_backups[1:]
 
             # Remove files and dirs (if backup had different source ids)
-            if not (len(_sources) == 1 and _sources[0] == source_id_none):
-                # All files
-                files_to_remove = [ i_file for i_file in backup_to_tmp.iterdir()
-                                    if i_file.is_file() ]
-                # All dirs except source-id subfolders
-                dirs_to_remove = [ i_dir for i_dir in backup_to_tmp.iterdir()
-                                    if i_dir.is_dir() and \
-                                    not i_dir.name in [i_source['id'] for i_source in _sources] ]
-                
-                # Delete files
-                for i_file in files_to_remove:
-                    _logger.info(f'↳ Deleting file "{i_file.absolute()}".')
-                    i_file.unlink()
-                
-                # Delete directories
-                for i_dir in dirs_to_remove:
-                    _logger.info(f'↳ Deleting directory "{i_dir.absolute()}".')
-                    rmtree(i_dir)
+            source_ids = {i_source['id'] for i_source in _sources}
+            if not source_ids == {_source_id_none}:
+                # Single pass: delete all files and all dirs except
+                # source-id subfolders
+                # Entries of an absolute path are absolute -> log them as they are
+                with os.scandir(backup_to_tmp) as it:
+                    for i_entry in it:
+                        if i_entry.is_dir(follow_symlinks=False):
+                            if not i_entry.name in source_ids:
+                                _logger.info('↳ Deleting directory "%s".', i_entry.path)
+                                rmtree(i_entry.path)
+                        else:
+                            _logger.info('↳ Deleting file "%s".', i_entry.path)
+                            os.unlink(i_entry.path)
             
             _logger.info('OK.')
         else:
             backup_to_tmp.mkdir(parents=True)
 
-    return 0
+    # Delete old backups (also leftovers of an interrupted run) in the background
+    deletion_thread = None
+    if backups_to_delete.exists():
+        deletion_thread = Thread(target=_delete_old_backups,
+                                 args=(backups_to_delete, _logger))
+        deletion_thread.start()
+
+    return 0, paths_old_backups, deletion_thread
+
+
+# _delete_old_backups
+#
+# Deletes all old backups in <_path_backups_to_delete> concurrently and removes
+# the folder afterwards.
+#
+# @param Path   _path_backups_to_delete
+# @param        _logger
+def _delete_old_backups(_path_backups_to_delete, _logger):
+    from shutil import rmtree
+
+    # remove_backup
+    # @param str    path
+    def remove_backup(path):
+        _logger.info('Deleting old backup: "%s"', path)
+        rmtree(path)
+        _logger.info('Deleted old backup: "%s"', path)
+
+    try:
+        with os.scandir(_path_backups_to_delete) as it:
+            paths_to_remove = [i_entry.path for i_entry in it]
+        # Delete old backups concurrently (unlink() is latency-bound)
+        if len(paths_to_remove) > 0:
+            with ThreadPoolExecutor(max_workers=min(8, len(paths_to_remove))) as executor:
+                # list() re-raises exceptions from the worker threads
+                list(executor.map(remove_backup, paths_to_remove))
+        os.rmdir(_path_backups_to_delete)
+    except OSError as e:
+        _logger.error(f'Cannot delete old backups: {e}')
+
+
+# _run_rsync
+#
+# Executes rsync and forwards its stdout and stderr line by line to the logger
+# while it is running. The output is never buffered as a whole.
+#
+# @param [str]  _rsync_cmd
+# @param        _logger
+#
+# @return Returns the return code of rsync
+def _run_rsync(_rsync_cmd, _logger):
+    from subprocess import PIPE, Popen
+
+    # forward_stream
+    # @param        stream
+    # @param str    name
+    def forward_stream(stream, name):
+        for i_line in stream:
+            # Lazy %-formatting: only done if the record is emitted
+            _logger.warning('Rsync %s: %s', name, i_line.rstrip())
+
+    try:
+        process = Popen(_rsync_cmd, stdout=PIPE, stderr=PIPE, bufsize=1,
+                        encoding='utf-8', errors='replace')
+    except OSError as e:
+        # e.g. rsync is not installed; the shell used to report this as 127
+        _logger.error(f'Cannot execute rsync: {e}')
+        return 127
+
+    with process:
+        # One thread per pipe so neither of them can fill up and block rsync
+        threads = [ Thread(target=forward_stream, args=(process.stdout, 'stdout')),
+                    Thread(target=forward_stream, args=(process.stderr, 'stderr')) ]
+        for i_thread in threads:
+            i_thread.start()
+        for i_thread in threads:
+            i_thread.join()
+        return process.wait()
 
 
 # _do_backup
@@ -513,100 +739,122 @@ def _prepare_backup(_sources, _destination, _keep_n_backups, _logger):
 # @param dict   _sources
 # @param str    _source_id_none
 # @param dict   _destination
+# @param [Path] _paths_old_backups
 # @param dict   _backup_excludes
 # @param str    _datetime_string_now
 # @param Path   _path_log_files
+# @param int    _n_parallel
 # @param        _logger
 #
 # @return <err_code>, <log_files>
 #
+# @note <_paths_old_backups> must be sorted (see _prepare_backup()).
+# @note Up to <_n_parallel> sources are backed up at the same time.
+# @note The <_MAX_LINK_DEST> latest backups are used for --link-dest.
+#
 # err_code (5x)
-def _do_backup(_sources, _source_id_none, _destination, _backup_excludes,
-               _datetime_string_now, _path_log_files, _logger):
+def _do_backup(_sources, _source_id_none, _destination, _paths_old_backups,
+               _backup_excludes, _datetime_string_now, _path_log_files,
+               _n_parallel, _logger):
+    import shlex
+
     # Path of all log-files
     log_files = []
 
-    backup_to_tmp = _destination['path'].joinpath('tmp_partial_backup')
-
-    # Get path to latest backup for --link-dest (higher-layer)
-    path_latest_backup = None
-    _logger.info('Looking for latest backup for --link-dest...')
-
-    paths_old_backups = _get_old_backups(_destination['path'])
-    if not paths_old_backups == []:
-        path_latest_backup = max(paths_old_backups)
-        _logger.info(f'Potential backup found: "{path_latest_backup.absolute()}"')
-    else:
+    path_destination = _destination['path']
+    backup_to_tmp = path_destination.joinpath('tmp_partial_backup')
+    str_backup_to_tmp = str(backup_to_tmp)
+
+    # Get paths to latest backups for --link-dest (higher-layer), latest first:
+    # rsync uses the first directory that contains an identical file
+    _logger.info('Looking for latest backups for --link-dest...')
+    paths_link_dest_backups = _paths_old_backups[:-_MAX_LINK_DEST - 1:-1]
+    for i_backup in paths_link_dest_backups:
+        _logger.info(f'Potential backup found: "{i_backup}"')
+    if paths_link_dest_backups == []:
         _logger.info('No backup found.')
 
     # Path of the new incremental backup (higher-layer)
-    path_backup = _destination['path'].joinpath(_datetime_string_now)
-    _logger.info(f'Backup will be created on "{path_backup.absolute()}"')
+    path_backup = path_destination.joinpath(_datetime_string_now)
+    _logger.info(f'Backup will be created on "{path_backup}"')
     
+    # rsync commands of all sources
+    rsync_cmds = []
     for i_source in _sources:
-        # Create link-dest string
-        rsync_cmd_arg_linkDest = ' '
-        if not path_latest_backup is None:
-            tmp_link_dest_path = None
-            tmp_link_dest_go_up = '../'
-            if i_source['id'] == _source_id_none:
-                tmp_link_dest_path = path_latest_backup
+        source_id = i_source['id']
+        path_source = i_source['path']
+
+        # Create link-dest arguments
+        rsync_args_link_dest = []
+        for i_backup in paths_link_dest_backups:
+            # --link-dest is relative to the rsync destination directory
+            tmp_link_dest_path = str(i_backup)
+            tmp_link_dest_rel = f'../{i_backup.name}'
+            if not source_id == _source_id_none:
+                tmp_link_dest_path = os.path.join(tmp_link_dest_path, source_id)
+                tmp_link_dest_rel = f'../../{i_backup.name}/{source_id}'
+            rsync_arg_link_dest = f'--link-dest={tmp_link_dest_rel}'
+            if os.path.exists(tmp_link_dest_path):
+                rsync_args_link_dest.append(rsync_arg_link_dest)
             else:
-                tmp_link_dest_go_up = '../../'
-                tmp_link_dest_path = path_latest_backup.joinpath(i_source['id'])
-            rsync_cmd_arg_linkDest = f'--link-dest "{tmp_link_dest_go_up}'\
-                                     f'{tmp_link_dest_path.relative_to(_destination["path"])}" '
-            if not tmp_link_dest_path.exists():
-                rsync_cmd_arg_linkDest = ' '
-                _logger.warning(f'Cannot use "--link-dest {tmp_link_dest_go_up}'\
-                                f'{tmp_link_dest_path.relative_to(_destination["path"])}".')
-                _logger.warning(f'↳ Maybe the source id "{i_source["id"]}" changed?')
-
-        # Create exclude string
-        rsync_cmd_arg_exclude = ' '
-        if len(_backup_excludes[i_source['id']]) > 0:
-            tmp_string_list = ','.join('"' + i_item + '"' for i_item in _backup_excludes[source['id']])
-            rsync_cmd_arg_exclude = f'--exclude={{{tmp_string_list}}} '
-        
-        # Create log-file string
-        tmp_logfile_filename = ''
-        if not i_source['id'] == _source_id_none:
-            tmp_logfile_filename = f'{_datetime_string_now}_{i_source["id"]}_rsync.log'
-        else:
-            tmp_logfile_filename = f'{_datetime_string_now}_rsync.log'
-        rsync_cmd_arg_log_file = f'--log-file "{_path_log_files.joinpath(tmp_logfile_filename).absolute()}" '
-        log_files.append(_path_log_files.joinpath(tmp_logfile_filename))
-
-        # Create dst-path string
-        tmp_dst = backup_to_tmp
-        if not i_source['id'] == _source_id_none:
-            tmp_dst = tmp_dst.joinpath(i_source['id'])
-        rsync_dst = tmp_dst.absolute()
+                _logger.warning(f'Cannot use "{rsync_arg_link_dest}".')
+                _logger.warning(f'↳ Maybe the source id "{source_id}" changed?')
 
-        rsync_cmd = f'rsync -a --delete {rsync_cmd_arg_exclude}'\
-                    f'{rsync_cmd_arg_linkDest}"'\
-                    f'{i_source["path"].absolute()}/" "{rsync_dst}" '\
-                    f'{rsync_cmd_arg_log_file}'
+        # Create log-file path
+        tmp_logfile_prefix = ''
+        if not source_id == _source_id_none:
+            tmp_logfile_prefix = f'{_datetime_string_now}_{source_id}'
+        else:
+            tmp_logfile_prefix = _datetime_string_now
+        path_log_file = _path_log_files.joinpath(f'{tmp_logfile_prefix}_rsync.log')
+        log_files.append(path_log_file)
 
+        # Create exclude arguments (rsync accepts --exclude multiple times)
+        excludes = _backup_excludes[source_id]
+        # rsync ignores lines starting with ';' or '#' in an exclude file
+        if len(excludes) > _MAX_EXCLUDE_ARGS and \
+           not any(i_item.startswith((';', '#')) for i_item in excludes):
+            path_exclude_file = _path_log_files.joinpath(f'{tmp_logfile_prefix}_excludes.txt')
+            with open(path_exclude_file, 'w') as file:
+                file.write(''.join(f'{i_item}\n' for i_item in excludes))
+            rsync_args_exclude = [f'--exclude-from={path_exclude_file}']
+        else:
+            rsync_args_exclude = [f'--exclude={i_item}' for i_item in excludes]
+
+        # Create dst-path (plain strings, rsync only needs the argument)
+        rsync_dst = str_backup_to_tmp
+        if not source_id == _source_id_none:
+            rsync_dst = os.path.join(str_backup_to_tmp, source_id)
+
+        # No shell involved: paths are passed to rsync as they are
+        rsync_cmd = [*_RSYNC_BASE_ARGS,
+                     *rsync_args_exclude,
+                     *rsync_args_link_dest,
+                     f'{path_source}/', rsync_dst,
+                     f'--log-file={path_log_file}']
+        rsync_cmds.append(rsync_cmd)
+
+    # run_rsync
+    # @param [str]  rsync_cmd
+    def run_rsync(rsync_cmd):
         _logger.info('Executing the following command:')
-        _logger.info(f'{rsync_cmd}')
+        _logger.info(shlex.join(rsync_cmd))
 
-        rsync_execution = run(rsync_cmd, shell=True, capture_output=True)
+        rsync_returncode = _run_rsync(rsync_cmd, _logger)
 
-        if rsync_execution.returncode != 0:
-            _logger.error(f'An error occured while running rsync: Return code: {rsync_execution.returncode}')
-        
-        rsync_stdout = rsync_execution.stdout.decode('utf-8')
-        if not rsync_stdout == '':
-            _logger.warning(f'Rsync produced the following output on stdout:\n{rsync_stdout}')
-            _logger.warning('END OF STDOUT CAPTURE')
-        rsync_stderr = rsync_execution.stderr.decode('utf-8')
-        if not rsync_stderr == '':
-            _logger.warning(f'Rsync produced the following output on stderr:\n{rsync_stderr}')
-            _logger.warning('END OF STDERR CAPTURE')
+        if rsync_returncode != 0:
+            _logger.error(f'An error occured while running rsync: Return code: {rsync_returncode}')
+    
+    if _n_parallel > 1 and len(rsync_cmds) > 1:
+        # Each source has its own subfolder and log-file
+        with ThreadPoolExecutor(max_workers=min(_n_parallel, len(rsync_cmds))) as executor:
+            list(executor.map(run_rsync, rsync_cmds))
+    else:
+        for i_rsync_cmd in rsync_cmds:
+            run_rsync(i_rsync_cmd)
 
     _logger.info(f'Renaming tmp_partial_backup folder to "{path_backup.stem}"...')
-    backup_to_tmp.rename(path_backup)
+    os.replace(backup_to_tmp, path_backup)
     _logger.info('Ok.')
 
     return 0, log_files
@@ -627,16 +875,16 @@ def _do_backup(_sources, _source_id_none, _destination, _backup_excludes,
 def _prepare_logging(_path_log_files, _path_log_summary, _logger):
     # Create log-files directory
     if not (_path_log_files.exists() and _path_log_files.is_dir()):
-        _logger.info(f'Creating log-files directory: "{_path_log_files.absolute()}"')
+        _logger.info(f'Creating log-files directory: "{_path_log_files}"')
         _path_log_files.mkdir(parents=True)
     
     # Create directory containing log-summary file
     if not _path_log_summary.parent.exists():
-        _logger.info(f'Creating directory for log-summary file: "{_path_log_summary.parent.absolute()}"')
+        _logger.info(f'Creating directory for log-summary file: "{_path_log_summary.parent}"')
         _path_log_summary.parent.mkdir(parents=True)
     elif (_path_log_summary.parent.exists() and not _path_log_summary.parent.is_dir()):
         _logger.error('Cannot create directory for log-summary file.')
-        _logger.error(f'Maybe a file with that name already exists? "{_path_log_summary.parent.absolute()}"')
+        _logger.error(f'Maybe a file with that name already exists? "{_path_log_summary.parent}"')
         return 1
     
     return 0
@@ -658,6 +906,7 @@ def _prepare_logging(_path_log_files, _path_log_summary, _logger):
 # @note err_code 1x: function _process_argparse()
 # @note err_code 11: ArgumentTypeError: <keep> must be positive int
 # @note err_code 12: ArgumentTypeError: <dst_fqdn> must be true, false, 0 or 1
+# @note err_code 13: ArgumentTypeError: <parallel> must be int > 0
 #
 # @note err_code 2x: function _process_arguments()
 # @note err_code 21: ArgumentTypeError: one or more sources have an invalid
@@ -679,6 +928,9 @@ def _prepare_logging(_path_log_files, _path_log_summary, _logger):
 #
 # @note err_code 4x: function _prepare_logging()
 # @note err_code 41: Cannot create directory for log-summary file
+#
+# @note err_code 6x: function _lock_destination()
+# @note err_code 61: another backup to this destination is running
 def backup(arguments = None, logger = None):
     datetime_string_now = datetime.today().strftime('%Y-%m-%d_%H:%M:%S')
     
@@ -694,11 +946,14 @@ def backup(arguments = None, logger = None):
                                         stream_logger={ 'log_level': logHandler.DEBUG, 'stream': None },
                                         file_logger={ 'log_level': logHandler.DEBUG,
                                                       'filename': tmp_path_log_file.absolute(),
-                                                      'write_mode': 'a' },
+                                                      'write_mode': 'a',
+                                                      'buffer_size': 65536 },
                                         mode='normal')
 
     logger.info(f'IncrementalBackup started at {datetime_string_now}')
     
+    source_id_none = '#DEFAULT_SOURCE_ID#'
+
     return_code = 0
     try:
         # Process arguments
@@ -709,9 +964,12 @@ def backup(arguments = None, logger = None):
         backup_excludes = None
         path_log_files = None
         path_log_summary = None
+        n_parallel = None
+        lock_file = None
+        deletion_thread = None
 
         if arguments is None:
-            err_code, sources, destination, keep_n_backups, backup_excludes, path_log_files, path_log_summary = _process_argparse(logger)
+            err_code, sources, destination, keep_n_backups, backup_excludes, path_log_files, path_log_summary, n_parallel = _process_argparse(logger, source_id_none)
         else:
             _src = arguments['src']
             _dst = arguments['dst']
@@ -720,9 +978,12 @@ def backup(arguments = None, logger = None):
             _dst_fqdn = arguments['dst_fqdn']
             _path_log_files = arguments['path_log_files']
             _path_log_summary = arguments['path_log_summary']
-            err_code, sources, destination, keep_n_backups, backup_excludes, path_log_files, path_log_summary = _process_arguments(_src, _dst, _keep,
+            _parallel = arguments.get('parallel', 1)
+            err_code, sources, destination, keep_n_backups, backup_excludes, path_log_files, path_log_summary, n_parallel = _process_arguments(_src, _dst, _keep,
                                                                                                  _exclude, _dst_fqdn,
-                                                                                                 _path_log_files, _path_log_summary)
+                                                                                                 _path_log_files, _path_log_summary,
+                                                                                                 _parallel=_parallel,
+                                                                                                 _source_id_none=source_id_none)
         if err_code != 0:
             return_code = err_code
             raise Exception()
@@ -742,38 +1003,60 @@ def backup(arguments = None, logger = None):
             return_code = err_code
             raise Exception()
         
+        # Lock destination
+        err_code, lock_file = _lock_destination(destination, logger)
+        if err_code != 0:
+            return_code = err_code
+            raise Exception()
+        
         # Prepare backup
-        err_code = _prepare_backup(sources, destination, keep_n_backups, logger)
+        err_code, paths_old_backups, deletion_thread = _prepare_backup(sources, source_id_none, destination, keep_n_backups, logger)
         if err_code != 0:
             return_code = err_code
             raise Exception()
         
         # Do backup
-        err_code, tmp_log_files = _do_backup(sources, '#NO_SOURCE_ID_SPECIFIED#', destination, backup_excludes, datetime_string_now, path_log_files, logger)
-        log_files = [ *log_files, *tmp_log_files ]
+        err_code, tmp_log_files = _do_backup(sources, source_id_none, destination, paths_old_backups, backup_excludes, datetime_string_now, path_log_files, n_parallel, logger)
+        log_files.extend(tmp_log_files)
         if err_code != 0:
             return_code = err_code
             raise Exception()
     except Exception:
-        logger.critical(f'An error occured. Terminating backup process at {datetime.today().strftime("%Y-%m-%d %H:%M:%S")}.')
+        # The time is part of every log record, no need to format it here
+        logger.critical('An error occured. Terminating backup process.')
+
+    # Wait for old backups to be deleted
+    if not deletion_thread is None:
+        logger.info('Waiting for old backups to be deleted...')
+        deletion_thread.join()
+        logger.info('OK.')
+
+    # Allow the next backup to this destination
+    if not lock_file is None:
+        lock_file.close()
 
     # List all log-files and write their paths to file
     logger.info('The following log-files were created:')
     for i_log_file in log_files:
-        logger.info(f'↳ {i_log_file.absolute()}')
+        logger.info(f'↳ {i_log_file}')
     
-    if path_log_summary.exists() and path_log_summary.is_file():
-        with open(f'{path_log_summary}', 'w') as file:
-            for i_log_file in log_files:
-                file.write(f'{i_log_file.absolute()}\n')
+    # <path_log_summary> is None if the arguments could not be processed
+    if not path_log_summary is None and path_log_summary.is_file():
+        # Write all paths at once instead of one write() per log-file
+        with open(path_log_summary, 'w', buffering=65536) as file:
+            file.write(''.join(f'{i_log_file}\n' for i_log_file in log_files))
 
     if not tmp_path_log_file is None:
         logger.info('This log-file will be moved to log-files directory after the next message.')
     
     logger.info(f'IncrementalBackup finished at {datetime.today().strftime("%Y-%m-%d %H:%M:%S")}')
 
-    # Move log-file
+    # Move log-file (stays in the working directory if <path_log_files> is unknown)
     if not tmp_path_log_file is None:
+        # Write buffered records before the file is moved
+        for i_handler in logger.handlers:
+            i_handler.flush()
+    if not tmp_path_log_file is None and not path_log_files is None:
         tmp_path_log_file.rename(path_log_files.joinpath(log_file_filename))
 
     return return_code
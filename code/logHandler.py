@@ -9,7 +9,7 @@
 # @license: MIT License
 # @copyright: Copyright (c) 2022 Andreas Menzel
 #-------------------------------------------------------------------------------
-# version: 2022-10-09_1
+# version: 2026-10-15_1
 
 import logging
 
@@ -78,6 +78,36 @@ class CustomFormatter(logging.Formatter):
         return formatter.format(record)
 
 
+# BufferedFileHandler
+#
+# FileHandler that does not flush the file after every record. The records are
+# collected in the buffer of the file object and written in blocks of
+# <buffer_size> bytes. Records with level >= <flush_level> are flushed at once,
+# so errors are on disk even if the program crashes afterwards.
+class BufferedFileHandler(logging.FileHandler):
+    def __init__(self, filename, mode = 'a', buffer_size = 65536,
+                 flush_level = ERROR):
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        self._flush_on_emit = False
+
+        super().__init__(filename, mode=mode)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record):
+        # StreamHandler.emit() calls flush() after every record
+        self._flush_on_emit = record.levelno >= self.flush_level
+        super().emit(record)
+        self._flush_on_emit = True
+
+    def flush(self):
+        if self._flush_on_emit:
+            super().flush()
+
+
 # get_logger
 #
 # Returns a logger object.
@@ -92,6 +122,8 @@ class CustomFormatter(logging.Formatter):
 #       If stream is None, the default logging stream will be used
 # @note file_logger must have the following format:
 #       { 'log_level': <log_level>, 'filename': <filename>, 'write_mode': 'w'|'a' }
+#       Optional: 'buffer_size': <bytes>. If set, the file is written in blocks
+#       of <bytes> and only flushed for errors or when flush() is called.
 #
 # @return Returns the logger object.
 def get_logger(name, stream_logger = None, file_logger = None, mode = None):
@@ -115,7 +147,12 @@ def get_logger(name, stream_logger = None, file_logger = None, mode = None):
         if write_mode not in ['w', 'a']:
             write_mode = 'a'
 
-        handler = logging.FileHandler(filename, mode=write_mode)
+        buffer_size = file_logger.get('buffer_size')
+        if buffer_size is None:
+            handler = logging.FileHandler(filename, mode=write_mode)
+        else:
+            handler = BufferedFileHandler(filename, mode=write_mode,
+                                          buffer_size=buffer_size)
         handler.setLevel(log_level)
         handler.setFormatter(CustomFormatter(mode, coloured=False))
         logger.addHandler(handler)